@@ -0,0 +1,16 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+def queue_file_handler(filename):
+    """
+    Returns a QueueHandler whose records are written to filename by a background
+    QueueListener, so request threads don't block on disk writes.
+    Records are formatted by the returned handler (configure its 'formatter' as usual).
+    """
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, logging.FileHandler(filename))
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(log_queue)
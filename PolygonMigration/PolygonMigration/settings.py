@@ -133,6 +133,8 @@ AZURE_CLIENT_ID = os.getenv("AZURE_CLIENT_ID")
 AZURE_USERNAME = os.getenv("AZURE_USERNAME")
 AZURE_PASSWORD = os.getenv("AZURE_PASSWORD")
 AZURE_CONTAINER_NAME = os.getenv("AZURE_CONTAINER_NAME")
+# Set to False for accounts that reject Blob Batch requests (e.g. hierarchical namespace)
+AZURE_BATCH_DELETE = os.getenv("AZURE_BATCH_DELETE", "True").lower() == "true"
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT")
@@ -158,7 +160,8 @@ LOGGING = {
             'formatter': 'verbose',  # or 'simple'
         },
         'file': {
-            'class': 'logging.FileHandler',
+            # File writes happen on a background listener thread
+            '()': 'PolygonMigration.log_queue.queue_file_handler',
             'filename': os.path.join(BASE_DIR, 'logs', 'project.log'),
             'formatter': 'verbose',
         },
@@ -1,4 +1,8 @@
+import logging
 from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional, Union
+
+logger = logging.getLogger(__name__)
 
 class StorageProvider(ABC):
     """
@@ -7,16 +11,41 @@ class StorageProvider(ABC):
     """
 
     @abstractmethod
-    def upload(self, path: str, content: bytes) -> None:
+    def upload(self, path: str, content: Union[bytes, BinaryIO], length: Optional[int] = None) -> None:
         """
         Uploads content to the specified path.
 
         Args:
             path (str): Relative path ensuring unique identification (e.g., 'test_cases/101/01').
-            content (bytes): The binary content to be stored.
+            content (bytes | BinaryIO): The binary content to be stored, or a readable binary
+                stream which is consumed without loading it fully into memory.
+            length (int, optional): Size hint for a stream, if known. It must equal the bytes
+                remaining in the stream; providers may use it to pick a request type, but
+                the stored content is always the stream read to EOF.
         """
         pass
 
+    def upload_many(self, items: list[tuple[str, bytes]]) -> None:
+        """
+        Uploads several files in one call. Providers that can overlap requests
+        override this; the default uploads each item in turn.
+        Every item is attempted; the first failure is raised at the end.
+
+        Args:
+            items (list[tuple[str, bytes]]): (path, content) pairs, as accepted by upload().
+        """
+        errors = []
+        for path, content in items:
+            try:
+                self.upload(path, content)
+            except Exception as e:
+                logger.error("Upload Error for %s: %s", path, e)
+                errors.append(e)
+
+        logger.info("%s: Uploaded %d of %d files", type(self).__name__, len(items) - len(errors), len(items))
+        if errors:
+            raise errors[0]
+
     @abstractmethod
     def delete_by_prefix(self, prefix: str) -> None:
         """
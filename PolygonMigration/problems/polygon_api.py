@@ -740,7 +740,7 @@ class PolygonAPI:
         prefix = f"test_cases/{problem_id_for_naming}/"
         storage_provider.delete_by_prefix(prefix)
 
-        uploaded_count = 0
+        upload_items = []
         for idx, test in enumerate(test_cases, start=1):
             input_data = test.get('input', '')
             output_data = test.get('output', '')
@@ -750,21 +750,19 @@ class PolygonAPI:
                 input_blob_name = f"test_cases/{problem_id_for_naming}/{idx:02d}"
                 output_blob_name = f"test_cases/{problem_id_for_naming}/{idx:02d}.a"
                 
-                try: 
-                    # Upload input
-                    storage_provider.upload(input_blob_name, input_data.encode('utf-8'))
-                    
-                    # Upload output
-                    storage_provider.upload(output_blob_name, output_data.encode('utf-8'))
-                    
-                    uploaded_count += 1
-                except Exception as e:
-                    logger.error(f"Error uploading test case #{idx}: {e}")
+                upload_items.append((input_blob_name, input_data.encode('utf-8')))
+                upload_items.append((output_blob_name, output_data.encode('utf-8')))
 
             else:
                 logger.warning(f"Skipping test case #{idx}: missing input or output. input: {repr(input_data[:50] + ('...' if len(input_data) > 50 else ''))}, output: {repr(output_data[:50] + ('...' if len(output_data) > 50 else ''))}")
         
-        logger.info("Uploaded %d test cases to Storage", uploaded_count)
+        try:
+            # Providers overlap these requests where they can
+            storage_provider.upload_many(upload_items)
+            logger.info("Uploaded %d test cases to Storage", len(upload_items) // 2)
+        except Exception as e:
+            # The provider's upload_many has already logged how many items succeeded
+            logger.error("Error uploading test cases (%d files attempted): %s", len(upload_items), e)
         
         # Handle custom checker if present
         logger.info("Starting custom checker processing for problem %s", problem_id)
@@ -1,33 +1,91 @@
+import asyncio
+import itertools
 import logging
 import os
+import queue
+import threading
+import requests
+from typing import BinaryIO, Optional, Union
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from azure.identity import UsernamePasswordCredential
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationError
+from azure.storage.blob import BlobServiceClient, PartialBatchErrorException
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+from azure.core.pipeline.transport import RequestsTransport
+from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationError, HttpResponseError
 from ..interfaces.storage import StorageProvider
 
 logger = logging.getLogger(__name__)
 
+class _AsyncCredentialAdapter:
+    """
+    Exposes a sync azure-identity credential through the async credential protocol.
+    azure.identity.aio has no UsernamePasswordCredential, so the sync one is reused
+    and its (rare, cached) token requests are run off the event loop.
+    """
+
+    def __init__(self, credential):
+        self._credential = credential
+
+    async def get_token(self, *scopes, **kwargs):
+        return await asyncio.to_thread(self._credential.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
 class AzureStorageProvider(StorageProvider):
     """
     Storage provider implementation for Azure Blob Storage.
     Reads credentials from Django settings.
     """
+
+    # Maximum number of sub-requests the Blob Batch API accepts in one call
+    BATCH_DELETE_SIZE = 256
+    LIST_PAGE_SIZE = 5000
+    # Listing pages fetched ahead of the delete loop
+    PREFETCH_PAGES = 2
+    # Cap on in-flight single-blob deletes when the Batch API can't be used
+    MAX_CONCURRENT_DELETES = 100
+    # Error codes meaning the account can never accept batch requests (e.g. hierarchical
+    # namespace accounts). Only these disable batching for the life of the provider;
+    # throttling and server errors are retried by the SDK and then raised.
+    BATCH_UNSUPPORTED_ERROR_CODES = {
+        'FeatureNotSupportedForAccount',
+        'FeatureVersionMismatch',
+        'NotImplemented',
+    }
+    # Cap on in-flight uploads in upload_many
+    MAX_CONCURRENT_UPLOADS = 64
+    # Size of the shared HTTP connection pool used by the sync client. It must cover the
+    # most concurrent requests sent through it; extra connections would be discarded.
+    CONNECTION_POOL_SIZE = MAX_CONCURRENT_DELETES
+    # Read/write block size for the transport (default is 4 KiB)
+    CONNECTION_DATA_BLOCK_SIZE = 64 * 1024
     
     def __init__(self):
         self.account_url = settings.AZURE_STORAGE_ACCOUNT_URL
         self.container_name = settings.AZURE_CONTAINER_NAME
+        # Some accounts (e.g. hierarchical namespace) reject batch requests
+        self.use_batch_delete = getattr(settings, 'AZURE_BATCH_DELETE', True)
         
         tenant_id = settings.AZURE_TENANT_ID
         client_id = settings.AZURE_CLIENT_ID
         username = settings.AZURE_USERNAME
         password = settings.AZURE_PASSWORD
         
+        self.credential = None
         self.blob_service_client = None
 
         logger.info("Initializing AzureStorageProvider...")
         try:
-            credential = UsernamePasswordCredential(
+            self.credential = UsernamePasswordCredential(
                 tenant_id=tenant_id,
                 client_id=client_id,
                 username=username,
@@ -35,56 +93,214 @@ class AzureStorageProvider(StorageProvider):
             )
             self.blob_service_client = BlobServiceClient(
                 account_url=self.account_url, 
-                credential=credential
+                credential=self.credential,
+                transport=self._build_transport(),
+                connection_data_block_size=self.CONNECTION_DATA_BLOCK_SIZE
             )
             # Verify container exists or create it? 
             # Current implementation assumes it exists. We can leave it as is.
             
             logger.info("Azure authentication successful.")
         except ClientAuthenticationError as e:
-            logger.error(f"Azure Authentication Failed: {e}")
+            logger.error("Azure Authentication Failed: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Azure Initialization Error: {e}")
+            logger.error("Azure Initialization Error: %s", e)
             raise
 
-    def upload(self, path: str, content: bytes) -> None:
+    def upload(self, path: str, content: Union[bytes, BinaryIO], length: Optional[int] = None) -> None:
         """
         Uploads content as a blob to the configured container.
         Args:
             path: Blob name (e.g. 'test_cases/1/01')
-            content: Bytes content to upload
+            content: Bytes content, or a binary stream read in blocks, to upload
+            length: Stream length in bytes, if known
         """
         try:
             blob_client = self.blob_service_client.get_blob_client(
                 container=self.container_name, 
                 blob=path
             )
-            blob_client.upload_blob(content, overwrite=True)
-            logger.info(f"Azure Upload: Uploaded to {path}")
+            blob_client.upload_blob(content, length=length, overwrite=True, max_concurrency=4)
+            logger.info("Azure Upload: Uploaded to %s", path)
         except Exception as e:
-            logger.error(f"Azure Upload Error for {path}: {e}")
+            logger.error("Azure Upload Error for %s: %s", path, e)
             raise
 
+    def _build_transport(self) -> RequestsTransport:
+        """
+        Builds a requests transport backed by a session with an enlarged connection pool,
+        so concurrent deletes and uploads share keep-alive connections.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.CONNECTION_POOL_SIZE,
+            pool_maxsize=self.CONNECTION_POOL_SIZE
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return RequestsTransport(session=session, session_owner=False)
+
+    async def _upload_one(self, client, path: str, content: bytes, semaphore) -> None:
+        async with semaphore:
+            try:
+                blob_client = client.get_blob_client(container=self.container_name, blob=path)
+                await blob_client.upload_blob(content, overwrite=True)
+            except Exception as e:
+                logger.error("Azure Upload Error for %s: %s", path, e)
+                raise
+
+    async def _upload_many_async(self, items) -> None:
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_UPLOADS)
+        async with AsyncBlobServiceClient(
+            account_url=self.account_url,
+            credential=_AsyncCredentialAdapter(self.credential)
+        ) as client:
+            results = await asyncio.gather(
+                *[self._upload_one(client, path, content, semaphore) for path, content in items],
+                return_exceptions=True
+            )
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        logger.info("Azure Upload: Uploaded %d of %d blobs", len(items) - len(errors), len(items))
+        if errors:
+            raise errors[0]
+
+    def upload_many(self, items: list[tuple[str, bytes]]) -> None:
+        """
+        Uploads all items concurrently on a single event loop, with at most
+        MAX_CONCURRENT_UPLOADS requests in flight.
+        Raises the first failure once every upload has finished.
+        """
+        asyncio.run(self._upload_many_async(items))
+
+    def _delete_blobs_concurrently(self, container_client, blob_names) -> int:
+        """
+        Deletes blobs one request each, keeping at most MAX_CONCURRENT_DELETES in flight.
+        blob_names may be a lazy iterator; names are consumed as slots free up.
+        Returns the number of blobs deleted, raising the first failure after all complete.
+        """
+        slots = threading.Semaphore(self.MAX_CONCURRENT_DELETES)
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_DELETES) as executor:
+            for name in blob_names:
+                slots.acquire()
+                future = executor.submit(container_client.delete_blob, name)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+
+        for future in futures:
+            future.result()
+        return len(futures)
+
+    def _delete_page(self, container_client, blob_names) -> tuple[int, list[str]]:
+        """
+        Deletes one listing page of blob names in Batch API chunks of BATCH_DELETE_SIZE.
+        Stops early if batching is (or becomes) disabled because the account rejects it.
+        Returns (blobs processed, names left for single deletes).
+        """
+        count = 0
+        for start in range(0, len(blob_names), self.BATCH_DELETE_SIZE):
+            chunk = blob_names[start:start + self.BATCH_DELETE_SIZE]
+            if not self.use_batch_delete:
+                return count, blob_names[start:]
+            try:
+                container_client.delete_blobs(*chunk)
+            except PartialBatchErrorException as e:
+                # Some sub-requests failed; log each one and keep going with the rest.
+                # A 404 means the blob is already gone, which is what we wanted.
+                failed = [part for part in e.parts if part.status_code >= 300 and part.status_code != 404]
+                for part in failed:
+                    logger.error("Azure Delete: batch sub-request failed (%s) for %s", part.status_code, part.request.url)
+                count += len(chunk) - len(failed)
+                continue
+            except HttpResponseError as e:
+                if e.status_code != 501 and e.error_code not in self.BATCH_UNSUPPORTED_ERROR_CODES:
+                    raise
+                # The account doesn't support batching; switch to single deletes from now on
+                logger.warning("Azure Delete: batch delete not supported (%s), falling back to concurrent deletes", e.error_code)
+                self.use_batch_delete = False
+                return count, blob_names[start:]
+            count += len(chunk)
+        return count, []
+
+    def _prefetch_pages(self, pages):
+        """
+        Iterates pages on a background thread, keeping up to PREFETCH_PAGES fetched ahead
+        of the caller. Yields each page as a list; listing errors are re-raised here.
+        """
+        page_queue = queue.Queue(maxsize=self.PREFETCH_PAGES)
+        done = object()
+        stop = threading.Event()
+
+        def put(item):
+            # Gives up once the consumer has stopped, so the thread can't block forever
+            while not stop.is_set():
+                try:
+                    page_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            try:
+                for page in pages:
+                    if stop.is_set():
+                        return
+                    put((list(page), None))
+                put((done, None))
+            except Exception as e:
+                put((None, e))
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                page, error = page_queue.get()
+                if error is not None:
+                    raise error
+                if page is done:
+                    return
+                yield page
+        finally:
+            stop.set()
+
     def delete_by_prefix(self, prefix: str) -> None:
         """
         Deletes all blobs starting with prefix in the configured container.
+        Deletes are sent through the Blob Batch API, up to BATCH_DELETE_SIZE per request.
+        Falls back to bounded concurrent single deletes if batching is disabled or rejected.
         """
         try:
             container_client = self.blob_service_client.get_container_client(self.container_name)
-            # List blobs starting with the prefix
-            blobs_to_delete = container_client.list_blobs(name_starts_with=prefix)
-            
-            # Using list comprehension to exhaust the iterator if not already a list
-            # But list_blobs returns an ItemPaged which is iterable.
-            # We must iterate and delete.
-            
-            count = 0
-            for blob in blobs_to_delete:
-                container_client.delete_blob(blob.name)
-                count += 1
+            # Names-only listing keeps the response payload small
+            blob_names = container_client.list_blob_names(
+                name_starts_with=prefix,
+                results_per_page=self.LIST_PAGE_SIZE
+            )
+
+            # The next listing page is fetched while the current one is being deleted
+            pages = self._prefetch_pages(blob_names.by_page())
+
+            try:
+                count = 0
+                remaining = []
+                if self.use_batch_delete:
+                    for page in pages:
+                        deleted, remaining = self._delete_page(container_client, page)
+                        count += deleted
+                        if remaining:
+                            break
+
+                if not self.use_batch_delete:
+                    # Batching is off, or was switched off partway: the rest of the listing
+                    # goes through a single pool rather than a new one per chunk
+                    rest = itertools.chain(remaining, (name for page in pages for name in page))
+                    count += self._delete_blobs_concurrently(container_client, rest)
+            finally:
+                # Stops the prefetch thread now rather than whenever the generator is collected
+                pages.close()
             
-            logger.info(f"Azure Delete: Deleted {count} blobs starting with {prefix}")
+            logger.info("Azure Delete: Deleted %d blobs starting with %s", count, prefix)
         except Exception as e:
-            logger.error(f"Azure Delete Error for prefix {prefix}: {e}")
+            logger.error("Azure Delete Error for prefix %s: %s", prefix, e)
             raise
@@ -0,0 +1,11 @@
+import json
+import functools
+
+@functools.lru_cache(maxsize=None)
+def load_credentials_json(path: str) -> dict:
+    """
+    Parses a credentials JSON file once per process.
+    The returned dict is shared between callers and must not be modified.
+    """
+    with open(path) as f:
+        return json.load(f)
@@ -4,18 +4,52 @@ from .local import LocalStorageProvider
 from .azure import AzureStorageProvider
 from .gdrive import GoogleDriveStorageProvider
 from .gcs import GoogleCloudStorageProvider
+import functools
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# googleapiclient's httplib2 transport is not thread-safe, so Drive providers
+# are reused per thread rather than shared between request threads.
+_UNSHARED_PROVIDERS = {'GDRIVE'}
+
+_providers_lock = threading.Lock()
+_thread_local = threading.local()
+
 def get_storage_provider() -> StorageProvider:
     """
     Factory function to return the configured StorageProvider.
     Defaults to LocalStorageProvider if STORAGE_PROVIDER is not set or unknown.
+    Instances are cached per provider type (per thread for Drive) so their SDK clients
+    keep authenticated, pooled connections alive across requests.
+    Call get_storage_provider.cache_clear() to force new instances (e.g. in tests).
     """
     provider_type = getattr(settings, 'STORAGE_PROVIDER', 'LOCAL').upper()
-    
-    logger.info(f"Storage Factory: initializing provider '{provider_type}'")
+
+    if provider_type in _UNSHARED_PROVIDERS:
+        providers = _thread_local.__dict__.setdefault('providers', {})
+        if provider_type not in providers:
+            providers[provider_type] = _create_provider(provider_type)
+        return providers[provider_type]
+
+    # The lock keeps concurrent first calls from building the provider twice
+    with _providers_lock:
+        return _shared_provider(provider_type)
+
+@functools.lru_cache(maxsize=None)
+def _shared_provider(provider_type: str) -> StorageProvider:
+    return _create_provider(provider_type)
+
+def _cache_clear() -> None:
+    global _thread_local
+    _shared_provider.cache_clear()
+    _thread_local = threading.local()
+
+get_storage_provider.cache_clear = _cache_clear
+
+def _create_provider(provider_type: str) -> StorageProvider:
+    logger.info("Storage Factory: initializing provider '%s'", provider_type)
     
     if provider_type == 'AZURE':
         return AzureStorageProvider()
@@ -26,5 +60,5 @@ def get_storage_provider() -> StorageProvider:
     elif provider_type == 'LOCAL':
         return LocalStorageProvider()
     else:
-        logger.warning(f"Unknown STORAGE_PROVIDER '{provider_type}', falling back to LOCAL.")
+        logger.warning("Unknown STORAGE_PROVIDER '%s', falling back to LOCAL.", provider_type)
         return LocalStorageProvider()
@@ -1,8 +1,14 @@
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import BinaryIO, Optional, Union
 from django.conf import settings
 from google.cloud import storage
+from google.cloud.storage.batch import Batch
+from google.api_core.exceptions import NotFound
 from ..interfaces.storage import StorageProvider
+from .credentials import load_credentials_json
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +18,12 @@ class GoogleCloudStorageProvider(StorageProvider):
     Uses a Service Account JSON file for authentication.
     """
 
+    # Maximum number of operations the GCS JSON batch endpoint accepts per request
+    BATCH_DELETE_SIZE = 100
+    # Number of batch requests kept in flight while the listing is still being paged
+    MAX_CONCURRENT_BATCHES = 8
+    LIST_PAGE_SIZE = 1000
+
     def __init__(self):
         self.credentials_file = settings.GCS_CREDENTIALS_FILE
         self.bucket_name = settings.GCS_BUCKET_NAME
@@ -25,57 +37,123 @@ class GoogleCloudStorageProvider(StorageProvider):
 
         try:
             # Initialize the client with the service account credentials
-            self.client = storage.Client.from_service_account_json(self.credentials_file)
+            self.client = storage.Client.from_service_account_info(
+                load_credentials_json(self.credentials_file)
+            )
             self.bucket = self.client.bucket(self.bucket_name)
             
             # Simple check if bucket exists or we have access
             if not self.bucket.exists():
-                logger.warning(f"GCS Bucket '{self.bucket_name}' does not exist or is not accessible. Attempting to create...")
+                logger.warning("GCS Bucket '%s' does not exist or is not accessible. Attempting to create...", self.bucket_name)
                 # Note: Creating buckets requires special permissions (Project Editor/Storage Admin)
                 # If using a restricted service account, create the bucket manually in Cloud Console first.
                 self.bucket = self.client.create_bucket(self.bucket_name)
             
-            logger.info(f"GCS Service initialized successfully. Bucket: {self.bucket_name}")
+            logger.info("GCS Service initialized successfully. Bucket: %s", self.bucket_name)
             
         except Exception as e:
-            logger.error(f"Failed to initialize GCS service: {e}")
+            logger.error("Failed to initialize GCS service: %s", e)
             raise
 
-    def upload(self, path: str, content: bytes) -> None:
+    def upload(self, path: str, content: Union[bytes, BinaryIO], length: Optional[int] = None) -> None:
         """
         Uploads content as a blob to GCS.
         path: 'test_cases/1/12' -> saved as object 'test_cases/1/12'
+        content may be bytes or a binary stream (streamed with upload_from_file).
         """
         try:
             # Remove leading slashes for object names in buckets
             blob_path = path.lstrip('/')
             blob = self.bucket.blob(blob_path)
             
-            blob.upload_from_string(content, content_type='application/octet-stream')
+            if isinstance(content, bytes):
+                blob.upload_from_string(content, content_type='application/octet-stream')
+            else:
+                blob.upload_from_file(content, size=length, content_type='application/octet-stream')
             
-            logger.info(f"GCS: Uploaded file {blob_path}")
+            logger.info("GCS: Uploaded file %s", blob_path)
                 
         except Exception as e:
-            logger.error(f"GCS Upload Error for {path}: {e}")
+            logger.error("GCS Upload Error for %s: %s", path, e)
             raise
 
+    def _delete_chunk(self, blobs) -> tuple[int, int]:
+        """
+        Deletes a chunk of blobs through the JSON batch endpoint (one HTTP request).
+        A single blob is deleted directly, as a batch would only add overhead.
+        Every sub-response is checked; 404s count as deleted (the object is already gone).
+        Returns (deleted, failed).
+        """
+        if len(blobs) == 1:
+            try:
+                blobs[0].delete()
+            except NotFound:
+                pass
+            return 1, 0
+
+        # The client's batch stack is thread-local, so workers can batch independently.
+        # The batch is sent with finish() rather than a with block, to get its responses back.
+        batch = Batch(self.client, raise_exception=False)
+        self.client._push_batch(batch)
+        try:
+            for blob in blobs:
+                blob.delete()
+        finally:
+            self.client._pop_batch()
+        responses = batch.finish(raise_exception=False)
+
+        failed = 0
+        for blob, response in zip(blobs, responses):
+            if response.status_code >= 300 and response.status_code != 404:
+                logger.error("GCS: failed to delete %s (%s)", blob.name, response.status_code)
+                failed += 1
+        return len(blobs) - failed, failed
+
     def delete_by_prefix(self, prefix: str) -> None:
         """
         Deletes all blobs handling the prefix.
         Expects prefix to be like 'test_cases/101/'
+        Blobs are streamed from the listing in batches of BATCH_DELETE_SIZE, which are
+        deleted by a worker pool so listing overlaps deletion.
         """
         try:
             clean_prefix = prefix.lstrip('/')
-            blobs = list(self.client.list_blobs(self.bucket, prefix=clean_prefix))
-            
-            if not blobs:
-                logger.warning(f"GCS: path {clean_prefix} not found or empty, nothing to delete.")
+            blobs = self.client.list_blobs(self.bucket, prefix=clean_prefix, page_size=self.LIST_PAGE_SIZE)
+
+            slots = threading.Semaphore(self.MAX_CONCURRENT_BATCHES)
+            futures = []
+
+            def submit(chunk):
+                slots.acquire()
+                future = executor.submit(self._delete_chunk, chunk)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+
+            with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_BATCHES) as executor:
+                chunk = []
+                for blob in blobs:
+                    chunk.append(blob)
+                    if len(chunk) == self.BATCH_DELETE_SIZE:
+                        submit(chunk)
+                        chunk = []
+                if chunk:
+                    submit(chunk)
+
+            count = 0
+            failed = 0
+            for future in as_completed(futures):
+                deleted, chunk_failed = future.result()
+                count += deleted
+                failed += chunk_failed
+
+            if not count and not failed:
+                logger.warning("GCS: path %s not found or empty, nothing to delete.", clean_prefix)
                 return
 
-            # Batch delete is more efficient
-            self.bucket.delete_blobs(blobs)
-            logger.info(f"GCS: Deleted {len(blobs)} files with prefix {clean_prefix}")
+            logger.info("GCS: Deleted %d files with prefix %s", count, clean_prefix)
+            if failed:
+                raise Exception(f"GCS: failed to delete {failed} files with prefix {clean_prefix}")
 
         except Exception as e:
-            logger.error(f"GCS Delete Error for {prefix}: {e}")
+            logger.error("GCS Delete Error for %s: %s", prefix, e)
             raise
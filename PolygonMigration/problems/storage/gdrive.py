@@ -1,18 +1,53 @@
 import os
 import io
 import logging
-import json
+import functools
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Union
 from django.conf import settings
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseUpload
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from ..interfaces.storage import StorageProvider
+from .credentials import load_credentials_json
 
 logger = logging.getLogger(__name__)
 
+FOLDER_QUERY = "name='{name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
+FILE_QUERY = "name='{name}' and '{parent_id}' in parents and trashed=false"
+
+@functools.lru_cache(maxsize=1024)
+def _escape_query_value(value: str) -> str:
+    """
+    Escapes a value for use inside a single-quoted Drive query string.
+    """
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+class _LRUCache(OrderedDict):
+    """
+    Dict that keeps at most maxsize entries, evicting the least recently used.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
 class GoogleDriveStorageProvider(StorageProvider):
     """
     Storage provider implementation for Google Drive.
@@ -20,34 +55,47 @@ class GoogleDriveStorageProvider(StorageProvider):
     """
 
     SCOPES = ['https://www.googleapis.com/auth/drive']
+    # Maximum number of calls Drive accepts in one batch request
+    BATCH_SIZE = 100
+    # Files below this size go up in a single multipart request instead of a resumable session
+    RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+    RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+    # Entries kept in each ID cache; providers live per thread for the whole process
+    CACHE_SIZE = 1024
 
     def __init__(self):
         self.credentials_file = settings.GOOGLE_DRIVE_CREDENTIALS_FILE
         self.root_folder_id = settings.GOOGLE_DRIVE_FOLDER_ID
+        # Lookup caches keyed by (parent_id, name) -> file/folder ID, so repeated
+        # uploads into the same folders skip the list round trips.
+        self._folder_cache: dict[tuple[str, str], str] = _LRUCache(self.CACHE_SIZE)
+        self._file_cache: dict[tuple[str, str], str] = _LRUCache(self.CACHE_SIZE)
+        # Full folder path (tuple of components) -> folder ID, so files sharing a
+        # folder resolve it with one dict lookup instead of a walk per component.
+        self._path_cache: dict[tuple[str, ...], str] = _LRUCache(self.CACHE_SIZE)
         
         if not self.credentials_file or not os.path.exists(self.credentials_file):
             raise Exception("Google Drive credentials file not found or not configured.")
         
         # Determine authentication type based on JSON content
-        with open(self.credentials_file) as f:
-            cred_data = json.load(f)
+        cred_data = load_credentials_json(self.credentials_file)
         
         if 'type' in cred_data and cred_data['type'] == 'service_account':
-            self._init_service_account(self.credentials_file)
+            self._init_service_account(cred_data)
         else:
-            self._init_oauth_client(self.credentials_file)
+            self._init_oauth_client(self.credentials_file, cred_data)
 
-    def _init_service_account(self, cred_file):
+    def _init_service_account(self, cred_data):
         try:
-            creds = service_account.Credentials.from_service_account_file(
-                cred_file, scopes=self.SCOPES)
+            creds = service_account.Credentials.from_service_account_info(
+                cred_data, scopes=self.SCOPES)
             self.service = build('drive', 'v3', credentials=creds)
             logger.info("Google Drive Service initialized (Service Account).")
         except Exception as e:
-            logger.error(f"Failed to initialize Google Drive service account: {e}")
+            logger.error("Failed to initialize Google Drive service account: %s", e)
             raise
 
-    def _init_oauth_client(self, client_secret_file):
+    def _init_oauth_client(self, client_secret_file, client_config):
         """
         Initializes Google Drive service using OAuth 2.0 User Credentials.
         This allows using Personal Drive storage quota.
@@ -69,8 +117,8 @@ class GoogleDriveStorageProvider(StorageProvider):
                      creds = None
 
             if not creds:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    client_secret_file, self.SCOPES)
+                flow = InstalledAppFlow.from_client_config(
+                    client_config, self.SCOPES)
                 # 'run_console' is deprecated/removed by Google (OOB flow).
                 # We MUST use run_local_server. We force port 8080 to match the Google Console config.
                 # User MUST add 'http://localhost:8080/' to Authorized Redirect URIs.
@@ -84,25 +132,21 @@ class GoogleDriveStorageProvider(StorageProvider):
             self.service = build('drive', 'v3', credentials=creds)
             logger.info("Google Drive Service initialized (User Credentials).")
         except Exception as e:
-            logger.error(f"Failed to initialize Google Drive user credentials: {e}")
+            logger.error("Failed to initialize Google Drive user credentials: %s", e)
             raise
 
     def _get_or_create_folder(self, folder_name, parent_id):
         """
         Helper to find a folder by name within a parent, or create it if missing.
         """
-        query = f"name='{folder_name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        results = self.service.files().list(
-            q=query, 
-            fields="files(id, name)",
-            supportsAllDrives=True,
-            includeItemsFromAllDrives=True
-        ).execute()
-        files = results.get('files', [])
+        cached_id = self._folder_cache.get((parent_id, folder_name))
+        if cached_id:
+            return cached_id
 
-        if files:
-            return files[0]['id']
-        else:
+        request = self._lookup_request(FOLDER_QUERY, folder_name, parent_id)
+        folder_id = self._first_match(request, request.execute())
+
+        if not folder_id:
             file_metadata = {
                 'name': folder_name,
                 'mimeType': 'application/vnd.google-apps.folder',
@@ -113,7 +157,121 @@ class GoogleDriveStorageProvider(StorageProvider):
                 fields='id',
                 supportsAllDrives=True
             ).execute()
-            return folder.get('id')
+            folder_id = folder.get('id')
+
+        self._folder_cache[(parent_id, folder_name)] = folder_id
+        return folder_id
+
+    def _lookup_request(self, query_template, name, parent_id):
+        """
+        Builds (without executing) a list request for a single item named name within parent_id.
+        Only the ID of the first match is requested, to keep the response small;
+        execute it through _first_match(), which follows partial pages.
+        """
+        query = query_template.format(
+            name=_escape_query_value(name),
+            parent_id=_escape_query_value(parent_id)
+        )
+        return self.service.files().list(
+            q=query, 
+            fields="nextPageToken, incompleteSearch, files(id)",
+            pageSize=1,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        )
+
+    def _first_match(self, request, response):
+        """
+        Returns the first file ID from a lookup response, or None if there is no match.
+        Drive may return empty pages before the end of the results, so an empty page
+        with a nextPageToken is followed rather than treated as "missing".
+        """
+        while True:
+            files = response.get('files', [])
+            if files:
+                return files[0]['id']
+            if response.get('incompleteSearch') and not response.get('nextPageToken'):
+                # Reporting "missing" here could create a duplicate file or folder
+                raise Exception("Google Drive returned an incomplete search result.")
+            if not response.get('nextPageToken'):
+                return None
+            request = self.service.files().list_next(request, response)
+            response = request.execute()
+
+    def _file_lookup_request(self, file_name, parent_id):
+        """
+        Builds (without executing) the list request that looks up file_name within parent_id.
+        """
+        return self._lookup_request(FILE_QUERY, file_name, parent_id)
+
+    def _execute_batch(self, requests):
+        """
+        Executes a dict of {request_id: HttpRequest} using BatchHttpRequest,
+        BATCH_SIZE calls per HTTP round trip.
+        Returns {request_id: response} for the calls that succeeded. Failed calls
+        (e.g. rate-limited sub-requests) are logged and left out, so callers can retry them.
+        """
+        results = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                logger.warning("Google Drive: batched call %s failed: %s", request_id, exception)
+            else:
+                results[request_id] = response
+
+        items = list(requests.items())
+        for start in range(0, len(items), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for request_id, request in items[start:start + self.BATCH_SIZE]:
+                batch.add(request, request_id=request_id)
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.warning("Google Drive: batch request failed: %s", e)
+
+        return results
+
+    def _find_file(self, file_name, parent_id):
+        """
+        Returns the ID of file_name within parent_id, or None if it doesn't exist.
+        """
+        cached_id = self._file_cache.get((parent_id, file_name))
+        if cached_id:
+            return cached_id
+
+        request = self._file_lookup_request(file_name, parent_id)
+        file_id = self._first_match(request, request.execute())
+
+        if not file_id:
+            return None
+        self._file_cache[(parent_id, file_name)] = file_id
+        return file_id
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """
+        Drops cached IDs for the folder (or file) at prefix, its direct children,
+        and every resolved path beneath it. Deeper (parent_id, name) entries
+        become unreachable once their ancestor is dropped.
+        """
+        parts = prefix.strip('/').split('/')
+        depth = len(parts)
+        for key in [key for key in self._path_cache if key[:depth] == tuple(parts)]:
+            del self._path_cache[key]
+
+        parent_id = self.root_folder_id
+        for part in parts[:-1]:
+            parent_id = self._folder_cache.get((parent_id, part))
+            if parent_id is None:
+                return
+
+        self._file_cache.pop((parent_id, parts[-1]), None)
+        folder_id = self._folder_cache.pop((parent_id, parts[-1]), None)
+        if folder_id is None:
+            return
+
+        for cache in (self._folder_cache, self._file_cache):
+            for key in [key for key in cache if key[0] == folder_id]:
+                del cache[key]
 
     def _resolve_path_to_folder(self, path):
         """
@@ -123,15 +281,56 @@ class GoogleDriveStorageProvider(StorageProvider):
         """
         parts = path.strip('/').split('/')
         file_name = parts[-1]
-        folder_path = parts[:-1]
+        folder_path = tuple(parts[:-1])
+
+        cached_id = self._path_cache.get(folder_path)
+        if cached_id:
+            return cached_id, file_name
         
         current_parent_id = self.root_folder_id
         for folder in folder_path:
             current_parent_id = self._get_or_create_folder(folder, current_parent_id)
-            
+
+        self._path_cache[folder_path] = current_parent_id
         return current_parent_id, file_name
 
-    def upload(self, path: str, content: bytes) -> None:
+    def _write_file(self, path, parent_id, file_name, content, file_id, length=None):
+        """
+        Uploads content, updating file_id if given or creating a new file in parent_id.
+        Streams of unknown length always use a resumable session.
+        """
+        if isinstance(content, bytes):
+            length = len(content)
+            content = io.BytesIO(content)
+
+        media = MediaIoBaseUpload(
+            content,
+            mimetype='application/octet-stream',
+            chunksize=self.RESUMABLE_CHUNK_SIZE,
+            resumable=length is None or length >= self.RESUMABLE_THRESHOLD
+        )
+
+        if file_id:
+            # Update existing file
+            self.service.files().update(
+                fileId=file_id, 
+                media_body=media,
+                supportsAllDrives=True
+            ).execute()
+            logger.debug("Google Drive: Updated file %s (ID: %s)", path, file_id)
+        else:
+            # Create new file
+            file_metadata = {'name': file_name, 'parents': [parent_id]}
+            new_file = self.service.files().create(
+                body=file_metadata, 
+                media_body=media, 
+                fields='id',
+                supportsAllDrives=True
+            ).execute()
+            self._file_cache[(parent_id, file_name)] = new_file.get('id')
+            logger.debug("Google Drive: Created file %s (ID: %s)", path, new_file.get('id'))
+
+    def upload(self, path: str, content: Union[bytes, BinaryIO], length: Optional[int] = None) -> None:
         """
         Uploads content as a file to Google Drive, creating folder structure as needed.
         """
@@ -139,79 +338,111 @@ class GoogleDriveStorageProvider(StorageProvider):
             parent_id, file_name = self._resolve_path_to_folder(path)
             
             # Check if file exists to update or create new
-            query = f"name='{file_name}' and '{parent_id}' in parents and trashed=false"
-            results = self.service.files().list(
-                q=query, 
-                fields="files(id)",
-                supportsAllDrives=True,
-                includeItemsFromAllDrives=True
-            ).execute()
-            files = results.get('files', [])
-
-            media = MediaIoBaseUpload(io.BytesIO(content), mimetype='application/octet-stream', resumable=True)
-
-            if files:
-                # Update existing file
-                file_id = files[0]['id']
-                self.service.files().update(
-                    fileId=file_id, 
-                    media_body=media,
-                    supportsAllDrives=True
-                ).execute()
-                logger.info(f"Google Drive: Updated file {path} (ID: {file_id})")
-            else:
-                # Create new file
-                file_metadata = {'name': file_name, 'parents': [parent_id]}
-                new_file = self.service.files().create(
-                    body=file_metadata, 
-                    media_body=media, 
-                    fields='id',
-                    supportsAllDrives=True
-                ).execute()
-                logger.info(f"Google Drive: Created file {path} (ID: {new_file.get('id')})")
+            file_id = self._find_file(file_name, parent_id)
+            self._write_file(path, parent_id, file_name, content, file_id, length)
+            logger.info("Google Drive: Uploaded file %s", path)
                 
         except Exception as e:
-            logger.error(f"Google Drive Upload Error for {path}: {e}")
+            logger.error("Google Drive Upload Error for %s: %s", path, e)
             raise
 
+    def upload_many(self, items: list[tuple[str, bytes]]) -> None:
+        """
+        Uploads several files, looking up which ones already exist with batched
+        list calls instead of one round trip per file.
+        Media uploads can't be batched and are still sent one by one.
+        """
+        resolved = []
+        lookups = {}
+        errors = []
+        for path, content in items:
+            try:
+                parent_id, file_name = self._resolve_path_to_folder(path)
+            except Exception as e:
+                # Other items can still go up; this one is reported with the rest
+                logger.error("Google Drive Upload Error for %s: %s", path, e)
+                errors.append(e)
+                continue
+            # Keep the cached ID now: creates in the write pass below can evict it from the LRU
+            file_id = self._file_cache.get((parent_id, file_name))
+            if file_id is None:
+                lookups[str(len(resolved))] = self._file_lookup_request(file_name, parent_id)
+            resolved.append((path, parent_id, file_name, content, file_id))
+
+        found = self._execute_batch(lookups)
+
+        for idx, (path, parent_id, file_name, content, file_id) in enumerate(resolved):
+            try:
+                if file_id is None and str(idx) in found:
+                    file_id = self._first_match(lookups[str(idx)], found[str(idx)])
+                elif file_id is None and str(idx) in lookups:
+                    # Batched lookup failed; retry it on its own
+                    file_id = self._find_file(file_name, parent_id)
+                self._write_file(path, parent_id, file_name, content, file_id)
+            except Exception as e:
+                logger.error("Google Drive Upload Error for %s: %s", path, e)
+                errors.append(e)
+
+        logger.info("Google Drive: Uploaded %d of %d files", len(items) - len(errors), len(items))
+        if errors:
+            raise errors[0]
+
+    def _find_folder_path(self, parts, use_cache=True):
+        """
+        Walks parts from the root folder without creating anything, using and filling
+        the folder cache. Returns the leaf folder ID, or None if any component is missing.
+        With use_cache=False every component is looked up again (the cache is still refreshed).
+        """
+        current_parent_id = self.root_folder_id
+        for part in parts:
+            folder_id = self._folder_cache.get((current_parent_id, part)) if use_cache else None
+            if folder_id is None:
+                request = self._lookup_request(FOLDER_QUERY, part, current_parent_id)
+                folder_id = self._first_match(request, request.execute())
+                if not folder_id:
+                    return None
+                self._folder_cache[(current_parent_id, part)] = folder_id
+            current_parent_id = folder_id
+        return current_parent_id
+
     def delete_by_prefix(self, prefix: str) -> None:
         """
         Deletes the directory corresponding to the prefix.
         Expects prefix to be a folder path string ending in '/' e.g., 'test_cases/101/'
+        If the folder was resolved earlier (e.g. by uploads), its cached ID is deleted
+        directly without walking the path.
         """
         try:
             # We assume the prefix maps to a folder structure
             # Logic: resolve the path up to the last folder and delete that folder
             folder_path = prefix.strip('/')
-            parts = folder_path.split('/')
+            parts = tuple(folder_path.split('/'))
             
             # Find the target folder
-            current_parent_id = self.root_folder_id
-            target_id = None
-            
-            for i, part in enumerate(parts):
-                query = f"name='{part}' and '{current_parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-                results = self.service.files().list(
-                    q=query, 
-                    fields="files(id)",
-                    supportsAllDrives=True,
-                    includeItemsFromAllDrives=True
-                ).execute()
-                files = results.get('files', [])
-                
-                if not files:
-                    logger.warning(f"Google Drive: path {prefix} not found, nothing to delete.")
+            target_id = self._path_cache.get(parts) or self._find_folder_path(parts)
+
+            for attempt in range(2):
+                if not target_id:
+                    logger.warning("Google Drive: path %s not found, nothing to delete.", prefix)
+                    self.invalidate_prefix(prefix)
                     return
-                
-                current_parent_id = files[0]['id']
-                if i == len(parts) - 1:
-                    target_id = current_parent_id
 
-            if target_id:
                 # Delete the folder and all contents
-                self.service.files().delete(fileId=target_id, supportsAllDrives=True).execute()
-                logger.info(f"Google Drive: Deleted folder {prefix} (ID: {target_id})")
+                try:
+                    self.service.files().delete(fileId=target_id, supportsAllDrives=True).execute()
+                    break
+                except HttpError as e:
+                    if e.resp.status != 404 or attempt:
+                        raise
+                    # Cached ID went stale: the folder may have been deleted and recreated
+                    # under a new ID (e.g. by another worker), so resolve the path afresh
+                    logger.warning("Google Drive: folder %s (ID: %s) no longer exists, re-resolving.", prefix, target_id)
+                    self.invalidate_prefix(prefix)
+                    target_id = self._find_folder_path(parts, use_cache=False)
+
+            self.invalidate_prefix(prefix)
+            logger.info("Google Drive: Deleted folder %s (ID: %s)", prefix, target_id)
 
         except Exception as e:
-            logger.error(f"Google Drive Delete Error for {prefix}: {e}")
+            logger.error("Google Drive Delete Error for %s: %s", prefix, e)
             raise
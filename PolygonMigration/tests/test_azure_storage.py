@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from azure.core.exceptions import HttpResponseError
+from azure.storage.blob import PartialBatchErrorException
+from problems.storage.azure import AzureStorageProvider
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/test.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('TestAzureStorage')
+
+class TestAzureMockedClient(SimpleTestCase):
+    """
+    Runs the provider against a mocked container client, so no credentials are needed.
+    """
+
+    def setUp(self):
+        logger.info("Setting up Azure mocked client test")
+        # Skip __init__ so no credential or service client is built
+        self.provider = AzureStorageProvider.__new__(AzureStorageProvider)
+        self.provider.container_name = 'test-container'
+        self.provider.use_batch_delete = True
+        self.provider.blob_service_client = mock.MagicMock()
+        self.container = self.provider.blob_service_client.get_container_client.return_value
+        # Single deletes run on worker threads; list.append keeps the record thread-safe
+        self.single_deletes = []
+        self.container.delete_blob.side_effect = self.single_deletes.append
+
+    def _list(self, *page_sizes):
+        pages = []
+        start = 0
+        for size in page_sizes:
+            pages.append([f"test_cases/101/{idx:05d}" for idx in range(start, start + size)])
+            start += size
+        self.container.list_blob_names.return_value.by_page.return_value = iter(pages)
+        return [name for page in pages for name in page]
+
+    def _http_error(self, status_code, error_code=None):
+        error = HttpResponseError(message=f"HTTP {status_code}")
+        error.status_code = status_code
+        error.error_code = error_code
+        return error
+
+    def test_connection_pool_covers_concurrent_deletes(self):
+        logger.info("Testing Azure connection pool size")
+        with mock.patch('problems.storage.azure.RequestsTransport') as transport:
+            self.provider._build_transport()
+
+        session = transport.call_args.kwargs['session']
+        adapter = session.get_adapter('https://account.blob.core.windows.net/')
+        self.assertGreaterEqual(adapter.poolmanager.connection_pool_kw['maxsize'], AzureStorageProvider.MAX_CONCURRENT_DELETES)
+        logger.info("Azure connection pool size verified")
+
+    def test_delete_by_prefix_falls_back_once_batching_is_rejected(self):
+        logger.info("Testing Azure delete_by_prefix when batching is rejected mid-listing")
+        names = self._list(600, 300)
+        # Two 256-name batches succeed, then the account rejects batching
+        self.container.delete_blobs.side_effect = [None, None, self._http_error(501)]
+
+        with mock.patch.object(self.provider, '_delete_blobs_concurrently',
+                               wraps=self.provider._delete_blobs_concurrently) as concurrent:
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        self.assertEqual(self.container.delete_blobs.call_count, 3)
+        self.assertEqual(sorted(self.single_deletes), names[512:])
+        # One pool for everything after the switch, not one per chunk
+        concurrent.assert_called_once()
+        self.assertFalse(self.provider.use_batch_delete)
+        logger.info("Azure batch fallback verified")
+
+    def test_delete_by_prefix_falls_back_on_unsupported_error_code(self):
+        logger.info("Testing Azure delete_by_prefix on an account without batch support")
+        names = self._list(10)
+        self.container.delete_blobs.side_effect = self._http_error(409, 'FeatureNotSupportedForAccount')
+
+        self.provider.delete_by_prefix("test_cases/101/")
+
+        self.assertEqual(sorted(self.single_deletes), names)
+        self.assertFalse(self.provider.use_batch_delete)
+
+    def test_delete_by_prefix_raises_transient_batch_errors(self):
+        logger.info("Testing Azure delete_by_prefix on a throttled batch")
+        self._list(10)
+        self.container.delete_blobs.side_effect = self._http_error(503, 'ServerBusy')
+
+        with self.assertRaises(HttpResponseError):
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        self.assertEqual(self.single_deletes, [])
+        self.assertTrue(self.provider.use_batch_delete)
+
+    def test_delete_by_prefix_stops_prefetch_on_error(self):
+        logger.info("Testing Azure delete_by_prefix stops listing after a delete error")
+
+        def endless_pages():
+            idx = 0
+            while True:
+                yield [f"test_cases/101/{idx:05d}"]
+                idx += 1
+
+        self.container.list_blob_names.return_value.by_page.return_value = endless_pages()
+        self.container.delete_blobs.side_effect = self._http_error(503, 'ServerBusy')
+        threads_before = threading.active_count()
+
+        # Held on purpose: the error's traceback keeps the page generator alive, so
+        # only an explicit close stops the prefetch thread here
+        error = None
+        try:
+            self.provider.delete_by_prefix("test_cases/101/")
+        except HttpResponseError as e:
+            error = e
+        self.assertIsNotNone(error)
+
+        deadline = time.monotonic() + 2
+        while threading.active_count() > threads_before and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(threading.active_count(), threads_before)
+        logger.info("Azure prefetch shutdown verified")
+
+    def test_delete_by_prefix_excludes_failed_batch_parts(self):
+        logger.info("Testing Azure delete_by_prefix with a partially failed batch")
+        self._list(3)
+        # Deleted, already gone, forbidden
+        parts = [mock.Mock(status_code=status) for status in (202, 404, 403)]
+        self.container.delete_blobs.side_effect = PartialBatchErrorException("partial", mock.Mock(), parts)
+
+        with self.assertLogs('problems.storage.azure', level='INFO') as logs:
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        output = "\n".join(logs.output)
+        self.assertIn("Deleted 2 blobs", output)
+        self.assertIn("batch sub-request failed (403)", output)
+        self.assertTrue(self.provider.use_batch_delete)
+        logger.info("Azure partial batch accounting verified")
+
+    def test_delete_by_prefix_raises_listing_errors(self):
+        logger.info("Testing Azure delete_by_prefix when listing fails partway")
+
+        def failing_pages():
+            yield ["test_cases/101/00001", "test_cases/101/00002"]
+            raise ValueError("listing failed")
+
+        self.container.list_blob_names.return_value.by_page.return_value = failing_pages()
+
+        with self.assertRaisesRegex(ValueError, "listing failed"):
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        # Pages fetched before the failure were still deleted
+        self.container.delete_blobs.assert_called_once_with("test_cases/101/00001", "test_cases/101/00002")
+        self.container.list_blob_names.assert_called_once_with(
+            name_starts_with="test_cases/101/",
+            results_per_page=AzureStorageProvider.LIST_PAGE_SIZE
+        )
+        logger.info("Azure listing error propagation verified")
@@ -1,8 +1,10 @@
 import os
 import unittest
+from unittest import mock
 import logging
 from django.conf import settings
 from django.test import SimpleTestCase
+from google.api_core.exceptions import NotFound
 from problems.storage.gcs import GoogleCloudStorageProvider
 
 # Configure logging
@@ -60,3 +62,63 @@ class TestGCSStorage(SimpleTestCase):
         
         self.assertFalse(blob.exists(), "Blob should have been deleted")
         logger.info("GCS delete successful")
+
+class TestGCSMockedDelete(SimpleTestCase):
+    """
+    Runs delete_by_prefix against a mocked client and batch, so no credentials are needed.
+    """
+
+    def setUp(self):
+        logger.info("Setting up GCS mocked delete test")
+        self.provider = GoogleCloudStorageProvider.__new__(GoogleCloudStorageProvider)
+        self.provider.client = mock.MagicMock()
+        self.provider.bucket = mock.MagicMock()
+        patcher = mock.patch('problems.storage.gcs.Batch')
+        self.batch_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.batch = self.batch_class.return_value
+
+    def _list(self, count):
+        blobs = []
+        for idx in range(count):
+            blob = mock.MagicMock()
+            blob.name = f"test_cases/101/{idx:02d}"
+            blobs.append(blob)
+        self.provider.client.list_blobs.return_value = iter(blobs)
+        return blobs
+
+    def test_delete_by_prefix_counts_sub_responses(self):
+        logger.info("Testing GCS delete_by_prefix with a failed sub-request")
+        blobs = self._list(3)
+        # Deleted, already gone, forbidden
+        self.batch.finish.return_value = [mock.Mock(status_code=204), mock.Mock(status_code=404), mock.Mock(status_code=403)]
+
+        with self.assertRaisesRegex(Exception, "failed to delete 1 files"):
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        self.batch_class.assert_called_once_with(self.provider.client, raise_exception=False)
+        self.batch.finish.assert_called_once_with(raise_exception=False)
+        self.provider.client._push_batch.assert_called_once_with(self.batch)
+        self.provider.client._pop_batch.assert_called_once_with()
+        for blob in blobs:
+            blob.delete.assert_called_once_with()
+        logger.info("GCS sub-response accounting verified")
+
+    def test_delete_by_prefix_treats_not_found_as_deleted(self):
+        logger.info("Testing GCS delete_by_prefix with only deleted and missing objects")
+        self._list(2)
+        self.batch.finish.return_value = [mock.Mock(status_code=204), mock.Mock(status_code=404)]
+
+        with self.assertLogs('problems.storage.gcs', level='INFO') as logs:
+            self.provider.delete_by_prefix("test_cases/101/")
+
+        self.assertIn("Deleted 2 files", "\n".join(logs.output))
+
+    def test_delete_by_prefix_single_blob_skips_batch(self):
+        logger.info("Testing GCS delete_by_prefix with a single object")
+        blobs = self._list(1)
+        blobs[0].delete.side_effect = NotFound("gone")
+
+        self.provider.delete_by_prefix("test_cases/101/")
+
+        self.batch_class.assert_not_called()
@@ -1,9 +1,11 @@
 import os
 import unittest
+from unittest import mock
 import logging
 from django.conf import settings
 from django.test import SimpleTestCase
-from problems.storage.gdrive import GoogleDriveStorageProvider
+from googleapiclient.errors import HttpError
+from problems.storage.gdrive import GoogleDriveStorageProvider, _LRUCache
 
 # Configure logging
 logging.basicConfig(
@@ -51,3 +53,190 @@ class TestGDriveStorage(SimpleTestCase):
         # Ideally, we would verify file absence, but path resolution logic is complex for test.
         # If delete didn't crash, we count as success for this simple script.
         pass
+
+class TestGDriveCacheInvalidation(SimpleTestCase):
+    """
+    Exercises the ID cache bookkeeping only, so no credentials are needed.
+    """
+
+    def setUp(self):
+        logger.info("Setting up GDrive cache invalidation test")
+        # Skip __init__ so no Drive service is built
+        self.provider = GoogleDriveStorageProvider.__new__(GoogleDriveStorageProvider)
+        self.provider.root_folder_id = 'root'
+        self.provider._folder_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+        self.provider._file_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+        self.provider._path_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+
+        # root/test_cases/101/{1.in, deep/2.in} and root/test_cases/102/1.in
+        self.provider._folder_cache[('root', 'test_cases')] = 'tc'
+        self.provider._folder_cache[('tc', '101')] = 'f101'
+        self.provider._folder_cache[('tc', '102')] = 'f102'
+        self.provider._folder_cache[('f101', 'deep')] = 'deep'
+        self.provider._file_cache[('f101', '1.in')] = 'file1'
+        self.provider._file_cache[('deep', '2.in')] = 'file2'
+        self.provider._file_cache[('f102', '1.in')] = 'file3'
+        self.provider._path_cache[('test_cases',)] = 'tc'
+        self.provider._path_cache[('test_cases', '101')] = 'f101'
+        self.provider._path_cache[('test_cases', '101', 'deep')] = 'deep'
+        self.provider._path_cache[('test_cases', '102')] = 'f102'
+
+    def test_invalidate_folder_prefix(self):
+        logger.info("Testing GDrive invalidate_prefix on a folder")
+        self.provider.invalidate_prefix("test_cases/101/")
+
+        self.assertNotIn(('tc', '101'), self.provider._folder_cache)
+        self.assertNotIn(('f101', 'deep'), self.provider._folder_cache)
+        self.assertNotIn(('f101', '1.in'), self.provider._file_cache)
+        self.assertNotIn(('test_cases', '101'), self.provider._path_cache)
+        self.assertNotIn(('test_cases', '101', 'deep'), self.provider._path_cache)
+
+        # Siblings and ancestors stay cached
+        self.assertEqual(self.provider._folder_cache.get(('tc', '102')), 'f102')
+        self.assertEqual(self.provider._file_cache.get(('f102', '1.in')), 'file3')
+        self.assertEqual(self.provider._path_cache.get(('test_cases',)), 'tc')
+        self.assertEqual(self.provider._path_cache.get(('test_cases', '102')), 'f102')
+        logger.info("GDrive folder invalidation verified")
+
+    def test_invalidate_file_prefix(self):
+        logger.info("Testing GDrive invalidate_prefix on a file")
+        self.provider.invalidate_prefix("test_cases/101/1.in")
+
+        self.assertNotIn(('f101', '1.in'), self.provider._file_cache)
+        self.assertEqual(self.provider._folder_cache.get(('tc', '101')), 'f101')
+        self.assertEqual(self.provider._path_cache.get(('test_cases', '101')), 'f101')
+        logger.info("GDrive file invalidation verified")
+
+    def test_invalidate_uncached_prefix(self):
+        logger.info("Testing GDrive invalidate_prefix on an uncached path")
+        self.provider.invalidate_prefix("other/103/")
+
+        self.assertEqual(len(self.provider._folder_cache), 4)
+        self.assertEqual(len(self.provider._file_cache), 3)
+        self.assertEqual(len(self.provider._path_cache), 4)
+
+    def test_lru_cache_evicts_oldest(self):
+        logger.info("Testing GDrive LRU cache eviction")
+        cache = _LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+class TestGDriveMockedService(SimpleTestCase):
+    """
+    Runs the provider against a mocked Drive service, so no credentials are needed.
+    """
+
+    def setUp(self):
+        logger.info("Setting up GDrive mocked service test")
+        self.provider = GoogleDriveStorageProvider.__new__(GoogleDriveStorageProvider)
+        self.provider.root_folder_id = 'root'
+        self.provider._folder_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+        self.provider._file_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+        self.provider._path_cache = _LRUCache(GoogleDriveStorageProvider.CACHE_SIZE)
+        self.provider.service = mock.MagicMock()
+        self.provider.service.new_batch_http_request.side_effect = self._new_batch
+        self.files = self.provider.service.files.return_value
+        self.files.create.return_value.execute.return_value = {'id': 'created'}
+        # Responses handed to batched list calls, by request_id; missing IDs report no match
+        self.batch_responses = {}
+
+    def _new_batch(self, callback):
+        batch = mock.MagicMock()
+        added = []
+        batch.add.side_effect = lambda request, request_id: added.append(request_id)
+        batch.execute.side_effect = lambda: [
+            callback(request_id, self.batch_responses.get(request_id, {'files': []}), None)
+            for request_id in added
+        ]
+        return batch
+
+    def test_upload_many_keeps_cached_id_evicted_during_writes(self):
+        logger.info("Testing GDrive upload_many with a cached file evicted by earlier creates")
+        self.provider._path_cache[('tc',)] = 'tc-id'
+        self.provider._file_cache = _LRUCache(1)
+        self.provider._file_cache[('tc-id', 'a')] = 'a-id'
+
+        self.provider.upload_many([("tc/n1", b"new"), ("tc/a", b"existing")])
+
+        created = [call.kwargs['body']['name'] for call in self.files.create.call_args_list]
+        updated = [call.kwargs['fileId'] for call in self.files.update.call_args_list]
+        self.assertEqual(created, ['n1'])
+        self.assertEqual(updated, ['a-id'])
+        logger.info("GDrive upload_many cached ID reuse verified")
+
+    def test_upload_many_continues_after_folder_failure(self):
+        logger.info("Testing GDrive upload_many when one folder can't be resolved")
+        self.provider._path_cache[('ok',)] = 'ok-id'
+        # Looking up the 'broken' folder fails; 'ok' is already cached
+        self.files.list.return_value.execute.side_effect = Exception("rate limited")
+
+        with self.assertRaisesRegex(Exception, "rate limited"):
+            self.provider.upload_many([("broken/01", b"lost"), ("ok/01", b"kept")])
+
+        created = [call.kwargs['body']['name'] for call in self.files.create.call_args_list]
+        self.assertEqual(created, ['01'])
+        logger.info("GDrive upload_many per-item folder errors verified")
+
+    def test_first_match_follows_empty_pages(self):
+        logger.info("Testing GDrive lookups follow empty pages with a nextPageToken")
+        request = mock.MagicMock()
+        next_request = self.files.list_next.return_value
+        next_request.execute.return_value = {'files': [{'id': 'found'}]}
+
+        file_id = self.provider._first_match(request, {'files': [], 'nextPageToken': 'page-2'})
+
+        self.assertEqual(file_id, 'found')
+        self.files.list_next.assert_called_once_with(request, {'files': [], 'nextPageToken': 'page-2'})
+        logger.info("GDrive lookup paging verified")
+
+    def test_first_match_reports_missing_on_last_page(self):
+        logger.info("Testing GDrive lookups report no match on a complete empty result")
+        self.assertIsNone(self.provider._first_match(mock.MagicMock(), {'files': []}))
+        self.files.list_next.assert_not_called()
+
+    def test_first_match_raises_on_incomplete_search(self):
+        logger.info("Testing GDrive lookups raise on an incomplete search")
+        with self.assertRaisesRegex(Exception, "incomplete search"):
+            self.provider._first_match(mock.MagicMock(), {'files': [], 'incompleteSearch': True})
+
+    def _not_found(self):
+        return HttpError(mock.Mock(status=404, reason='Not Found'), b'')
+
+    def test_delete_by_prefix_re_resolves_stale_folder_id(self):
+        logger.info("Testing GDrive delete_by_prefix with a stale cached folder ID")
+        self.provider._path_cache[('test_cases', '101')] = 'stale'
+        self.provider._folder_cache[('root', 'test_cases')] = 'tc'
+        self.provider._folder_cache[('tc', '101')] = 'stale'
+        self.files.delete.return_value.execute.side_effect = [self._not_found(), {}]
+        # Fresh lookups for 'test_cases' and '101', bypassing the cache
+        self.files.list.return_value.execute.side_effect = [
+            {'files': [{'id': 'tc'}]},
+            {'files': [{'id': 'fresh'}]},
+        ]
+
+        self.provider.delete_by_prefix("test_cases/101/")
+
+        deleted = [call.kwargs['fileId'] for call in self.files.delete.call_args_list]
+        self.assertEqual(deleted, ['stale', 'fresh'])
+        self.assertNotIn(('test_cases', '101'), self.provider._path_cache)
+        self.assertNotIn(('tc', '101'), self.provider._folder_cache)
+        logger.info("GDrive stale folder re-resolve verified")
+
+    def test_delete_by_prefix_raises_on_second_not_found(self):
+        logger.info("Testing GDrive delete_by_prefix when the re-resolved folder is also gone")
+        self.provider._path_cache[('test_cases', '101')] = 'stale'
+        self.files.delete.return_value.execute.side_effect = [self._not_found(), self._not_found()]
+        self.files.list.return_value.execute.side_effect = [
+            {'files': [{'id': 'tc'}]},
+            {'files': [{'id': 'fresh'}]},
+        ]
+
+        with self.assertRaises(HttpError):
+            self.provider.delete_by_prefix("test_cases/101/")
+        self.assertEqual(self.files.delete.call_count, 2)
@@ -1,7 +1,12 @@
+import io
 import os
 import shutil
+import sys
+import tempfile
+import threading
 import unittest
 import logging
+from unittest import mock
 from django.conf import settings
 from django.test import SimpleTestCase, override_settings
 from problems.storage.local import LocalStorageProvider
@@ -59,3 +64,161 @@ class TestLocalStorage(SimpleTestCase):
         self.assertFalse(os.path.exists(os.path.join(self.test_media_root, "folder/1.txt")))
         self.assertFalse(os.path.exists(os.path.join(self.test_media_root, "folder")))
         logger.info("LocalStorage delete_by_prefix verified")
+
+    def test_upload_from_fd(self):
+        logger.info("Testing LocalStorage upload_from_fd")
+        content = b"0123456789" * 1000
+        with tempfile.TemporaryFile() as src:
+            src.write(content)
+            src.flush()
+            # Copy starts from the descriptor's current offset
+            src.seek(10)
+            self.provider.upload_from_fd("fd_folder/file.txt", src.fileno(), len(content) - 10)
+
+        with open(os.path.join(self.test_media_root, "fd_folder/file.txt"), 'rb') as f:
+            self.assertEqual(f.read(), content[10:])
+        logger.info("LocalStorage upload_from_fd verified")
+
+    def test_upload_many(self):
+        logger.info("Testing LocalStorage upload_many")
+        items = [(f"many/{idx:02d}", f"data {idx}".encode()) for idx in range(1, 11)]
+        items.append(("many/nested/01.a", b"answer"))
+
+        self.provider.upload_many(items)
+
+        for path, content in items:
+            with open(os.path.join(self.test_media_root, path), 'rb') as f:
+                self.assertEqual(f.read(), content)
+        logger.info("LocalStorage upload_many verified")
+
+    def test_upload_after_delete_recreates_directory(self):
+        logger.info("Testing LocalStorage upload after delete_by_prefix")
+        self.provider.upload("folder/1.txt", b"old")
+        self.provider.delete_by_prefix("folder/")
+
+        self.provider.upload("folder/1.txt", b"new")
+
+        with open(os.path.join(self.test_media_root, "folder/1.txt"), 'rb') as f:
+            self.assertEqual(f.read(), b"new")
+        logger.info("LocalStorage directory cache invalidation verified")
+
+    def test_delete_by_prefix_during_upload_many(self):
+        logger.info("Testing LocalStorage delete_by_prefix while upload_many runs")
+        # Switch threads often so the delete overlaps the directory cache updates
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        items = [(f"busy/{idx:04d}/input", b"data") for idx in range(1000)]
+        uploaded = threading.Event()
+        errors = []
+
+        def delete_until_uploaded():
+            try:
+                while not uploaded.is_set():
+                    self.provider.delete_by_prefix("other/")
+            except Exception as e:
+                errors.append(e)
+
+        deleter = threading.Thread(target=delete_until_uploaded)
+        deleter.start()
+        try:
+            self.provider.upload_many(items)
+        finally:
+            uploaded.set()
+            deleter.join()
+
+        self.assertEqual(errors, [])
+        logger.info("LocalStorage concurrent directory cache updates verified")
+
+    def test_upload_stream(self):
+        logger.info("Testing LocalStorage upload from a stream")
+        content = b"streamed content" * 1000
+
+        self.provider.upload("stream_folder/file.txt", io.BytesIO(content), len(content))
+
+        with open(os.path.join(self.test_media_root, "stream_folder/file.txt"), 'rb') as f:
+            self.assertEqual(f.read(), content)
+        logger.info("LocalStorage stream upload verified")
+
+    def test_upload_stream_after_directory_removed(self):
+        logger.info("Testing LocalStorage stream upload into a directory removed behind its back")
+        self.provider.upload("gone/1.txt", b"old")
+        # Removed outside the provider, so the directory cache still lists it
+        shutil.rmtree(os.path.join(self.test_media_root, "gone"))
+
+        self.provider.upload("gone/1.txt", io.BytesIO(b"streamed"))
+
+        with open(os.path.join(self.test_media_root, "gone/1.txt"), 'rb') as f:
+            self.assertEqual(f.read(), b"streamed")
+        logger.info("LocalStorage stream upload directory recreation verified")
+
+    @unittest.skipUnless(hasattr(os, 'O_TMPFILE'), "O_TMPFILE not available on this platform")
+    def test_upload_stream_retries_only_the_link(self):
+        logger.info("Testing LocalStorage stream upload when the link step loses its directory")
+        self.provider.upload("relink/1.txt", b"old")
+        if not self.provider._use_tmpfile:
+            self.skipTest("Filesystem does not support O_TMPFILE")
+        link_proc_fd = LocalStorageProvider._link_proc_fd
+        calls = []
+
+        def remove_directory_then_link(fd, dst):
+            # The directory disappears after the stream was read, before the first link
+            if not calls:
+                shutil.rmtree(os.path.join(self.test_media_root, "relink"))
+            calls.append(dst)
+            link_proc_fd(fd, dst)
+
+        with mock.patch.object(LocalStorageProvider, '_link_proc_fd', side_effect=remove_directory_then_link):
+            self.provider.upload("relink/1.txt", io.BytesIO(b"streamed"))
+
+        with open(os.path.join(self.test_media_root, "relink/1.txt"), 'rb') as f:
+            self.assertEqual(f.read(), b"streamed")
+        logger.info("LocalStorage link retry verified")
+
+    @unittest.skipUnless(hasattr(os, 'O_TMPFILE'), "O_TMPFILE not available on this platform")
+    def test_upload_overwrites_existing_file(self):
+        logger.info("Testing LocalStorage upload over an existing file")
+        os.makedirs(self.test_media_root, exist_ok=True)
+        try:
+            os.close(os.open(self.test_media_root, os.O_TMPFILE | os.O_WRONLY, 0o644))
+        except OSError:
+            self.skipTest("Filesystem does not support O_TMPFILE")
+
+        self.provider.upload("overwrite/file.txt", b"first version")
+        self.provider.upload("overwrite/file.txt", b"second")
+
+        # The atomic O_TMPFILE + linkat path must have been used
+        self.assertIs(self.provider._use_tmpfile, True)
+
+        directory = os.path.join(self.test_media_root, "overwrite")
+        self.assertEqual(os.listdir(directory), ["file.txt"])
+        with open(os.path.join(directory, "file.txt"), 'rb') as f:
+            self.assertEqual(f.read(), b"second")
+        logger.info("LocalStorage overwrite verified")
+
+    @unittest.skipUnless(os.name == 'posix', "file modes are POSIX-only")
+    def test_upload_respects_umask(self):
+        logger.info("Testing LocalStorage file modes follow the umask")
+        old_umask = os.umask(0o002)
+        self.addCleanup(os.umask, old_umask)
+        with tempfile.TemporaryFile() as src:
+            src.write(b"data")
+            src.seek(0)
+            self.provider.upload_from_fd("modes/fd.txt", src.fileno(), 4)
+        self.provider.upload("modes/file.txt", b"data")
+
+        # Group-writable media keeps its group write bit, as with open(..., 'wb')
+        for name in ("file.txt", "fd.txt"):
+            mode = os.stat(os.path.join(self.test_media_root, "modes", name)).st_mode & 0o777
+            self.assertEqual(mode, 0o664)
+        logger.info("LocalStorage file modes verified")
+
+    def test_delete_by_prefix_nested(self):
+        logger.info("Testing LocalStorage delete_by_prefix on a nested tree")
+        self.provider.upload("tree/01", b"data")
+        self.provider.upload("tree/sub/02", b"data")
+        self.provider.upload("tree/sub/deeper/03", b"data")
+
+        self.provider.delete_by_prefix("tree/")
+
+        self.assertFalse(os.path.exists(os.path.join(self.test_media_root, "tree")))
+        logger.info("LocalStorage nested delete_by_prefix verified")
@@ -0,0 +1,63 @@
+import threading
+import logging
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from problems.storage import factory
+from problems.storage.factory import get_storage_provider
+from problems.storage.local import LocalStorageProvider
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/test.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('TestStorageFactory')
+
+class TestStorageFactory(SimpleTestCase):
+
+    def setUp(self):
+        logger.info("Setting up StorageFactory test")
+        get_storage_provider.cache_clear()
+
+    def tearDown(self):
+        logger.info("Tearing down StorageFactory test")
+        get_storage_provider.cache_clear()
+
+    @override_settings(STORAGE_PROVIDER='LOCAL')
+    def test_shared_provider_is_reused(self):
+        logger.info("Testing LOCAL provider is cached")
+        first = get_storage_provider()
+        second = get_storage_provider()
+
+        self.assertIsInstance(first, LocalStorageProvider)
+        self.assertIs(first, second)
+        logger.info("LOCAL provider reuse verified")
+
+    @override_settings(STORAGE_PROVIDER='LOCAL')
+    def test_cache_clear_builds_new_provider(self):
+        logger.info("Testing cache_clear resets the cached provider")
+        first = get_storage_provider()
+        get_storage_provider.cache_clear()
+        second = get_storage_provider()
+
+        self.assertIsNot(first, second)
+        logger.info("cache_clear reset verified")
+
+    @override_settings(STORAGE_PROVIDER='GDRIVE')
+    def test_gdrive_provider_is_per_thread(self):
+        logger.info("Testing GDRIVE providers are cached per thread")
+        # Stand in for the Drive provider so no credentials are needed
+        with mock.patch.object(factory, 'GoogleDriveStorageProvider', side_effect=lambda: object()):
+            main_first = get_storage_provider()
+            main_second = get_storage_provider()
+
+            other = []
+            thread = threading.Thread(target=lambda: other.extend([get_storage_provider(), get_storage_provider()]))
+            thread.start()
+            thread.join()
+
+        self.assertIs(main_first, main_second)
+        self.assertIs(other[0], other[1])
+        self.assertIsNot(main_first, other[0])
+        logger.info("GDRIVE per-thread caching verified")